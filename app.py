@@ -1,5 +1,102 @@
+from enum import IntEnum
+from functools import lru_cache
+
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:  # numba 미설치 시 순수 Python으로 동작
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
+
+
+class Species(IntEnum):
+    """고정 순서 성분 인덱스 (조성/계수 배열의 열 순서)"""
+
+    CH4 = 0
+    C2H6 = 1
+    C3H8 = 2
+    C6H6 = 3
+    He = 4
+    N2 = 5
+    H2O = 6
+    H2S = 7
+    O2 = 8
+    CO2 = 9
+    SO2 = 10
+
+
+# 명시적 시그니처로 import 시점에 컴파일 (첫 호출 지연 제거, 단일 특수화 유지)
+@njit(
+    "UniTuple(f8, 7)(f8[::1], f8, f8[::1], f8[::1], f8[::1], f8[::1],"
+    " i8, i8, i8, f8, f8, f8)",
+    cache=True,
+)
+def _solve_air(
+    x,
+    fuel_molar_flow,
+    o2req,
+    co2prod,
+    h2oprod,
+    so2prod,
+    idx_he,
+    idx_n2,
+    idx_h2o,
+    air_o2_ratio,
+    air_n2_ratio,
+    target_o2_ratio,
+):
+    """고정 순서 조성 배열 x에 대한 필요 공기량 계산 코어 (JIT 컴파일 대상)
+
+    짧은 벡터이므로 BLAS 의존 없는 (x * coeff).sum() 형태를 사용한다.
+    (필요 공기량, 이론적 O2, CO2, H2O, SO2, He, 연료 N2) 를 반환한다.
+    """
+    theoretical_o2 = fuel_molar_flow * (x * o2req).sum()
+
+    # CO2 생성량
+    co2_total = fuel_molar_flow * (x * co2prod).sum()
+
+    # H2O 생성량 (연료 내 H2O + 연소 생성 H2O)
+    h2o_total = fuel_molar_flow * (x[idx_h2o] + (x * h2oprod).sum())
+
+    # SO2 생성량
+    so2_total = fuel_molar_flow * (x * so2prod).sum()
+
+    # He 유량 (불활성 기체)
+    he_flow = fuel_molar_flow * x[idx_he]
+
+    # 연료 내 N2 유량
+    fuel_n2 = fuel_molar_flow * x[idx_n2]
+
+    # O2 공급량과 무관한 배기가스 항 (공기 중 N2와 잔여 O2 제외)
+    const_part = (
+        co2_total + h2o_total + so2_total + he_flow + fuel_n2 - theoretical_o2
+    )
+
+    # 총 배기가스는 O2 공급량에 대해 선형이므로 한 번에 계산:
+    #   total = const_part + o2_supply * (1 + k),  k = air_n2_ratio / air_o2_ratio
+    #   o2_remaining = o2_supply - theoretical_o2
+    #   o2_remaining / total = target_o2_ratio 를 o2_supply에 대해 대수적으로 풀이
+    k = air_n2_ratio / air_o2_ratio
+    denominator = 1.0 - target_o2_ratio * (1.0 + k)
+    required_o2 = (theoretical_o2 + target_o2_ratio * const_part) / denominator
+    return (
+        required_o2 / air_o2_ratio,
+        theoretical_o2,
+        co2_total,
+        h2o_total,
+        so2_total,
+        he_flow,
+        fuel_n2,
+    )
+
+
 class FuelGasCombustionCalculator:
     def __init__(self):
         # 분자량 정의 (kg/kmol)
@@ -41,167 +138,249 @@ class FuelGasCombustionCalculator:
         self.air_o2_ratio = 0.21
         self.air_n2_ratio = 0.79
 
+        # 공기 평균 분자량 (kg/kmol)
+        self._air_MW = (
+            self.MW["O2"] * self.air_o2_ratio + self.MW["N2"] * self.air_n2_ratio
+        )
+
+        # 고정 순서 성분 목록과 계수 벡터 (매 호출마다 dict 순회 대신 내적 사용)
+        # 순서는 Species enum이 정의하며, 인덱싱도 enum으로 수행
+        self.species = tuple(member.name for member in Species)
+        self._mw = np.array([self.MW[gas] for gas in self.species])
+        self._o2req = np.array(
+            [self.o2_requirement.get(gas, 0.0) for gas in self.species]
+        )
+        self._co2prod = np.array(
+            [self.co2_production.get(gas, 0.0) for gas in self.species]
+        )
+        self._h2oprod = np.array(
+            [self.h2o_production.get(gas, 0.0) for gas in self.species]
+        )
+        self._so2prod = np.array(
+            [self.so2_production.get(gas, 0.0) for gas in self.species]
+        )
+
+        # 배치 경로용 float32 계수 벡터 (대역폭 절반, 내적 오차 ~1e-7 상대)
+        self._mw32 = self._mw.astype(np.float32)
+        self._o2req32 = self._o2req.astype(np.float32)
+        self._co2prod32 = self._co2prod.astype(np.float32)
+        self._h2oprod32 = self._h2oprod.astype(np.float32)
+        self._so2prod32 = self._so2prod.astype(np.float32)
+
+        # 배기가스 성분 순서와 분자량 벡터
+        self._exhaust_species = ("CO2", "H2O", "SO2", "He", "O2", "N2")
+        self._mw_exh = np.array([self.MW[gas] for gas in self._exhaust_species])
+
+    def _vectorize_composition(self, composition):
+        """조성 dict를 self.species 순서의 배열로 변환"""
+        return np.array(
+            [composition.get(gas, 0.0) for gas in self.species]
+        )
+
     def calculate_molar_flow(self, mass_flow, composition):
         """질량 유량을 몰 유량으로 변환"""
-        avg_MW = sum(comp * self.MW[gas] for gas, comp in composition.items())
+        avg_MW = self._vectorize_composition(composition) @ self._mw
         return mass_flow / avg_MW
 
     def calculate_stoichiometric_o2(self, fuel_molar_flow, fuel_composition):
         """화학양론적 산소 요구량 계산"""
-        o2_required = 0
-        for fuel, fraction in fuel_composition.items():
-            if fuel in self.o2_requirement:
-                o2_required += fuel_molar_flow * fraction * self.o2_requirement[fuel]
-        return o2_required
+        x = self._vectorize_composition(fuel_composition)
+        return fuel_molar_flow * (x @ self._o2req)
 
     def calculate_air_requirement(
         self, fuel_molar_flow, fuel_composition, target_o2_ratio
     ):
-        """필요 공기량 계산"""
-        theoretical_o2 = self.calculate_stoichiometric_o2(
-            fuel_molar_flow, fuel_composition
-        )
-
-        def calculate_total_exhaust(o2_supply):
-            # CO2 생성량
-            co2_total = sum(
-                fuel_molar_flow * fuel_composition[fuel] * self.co2_production[fuel]
-                for fuel in self.co2_production.keys()
-                if fuel in fuel_composition
-            )
-
-            # H2O 생성량 (연료 내 H2O + 연소 생성 H2O)
-            h2o_total = fuel_molar_flow * fuel_composition["H2O"] + sum(
-                fuel_molar_flow * fuel_composition[fuel] * self.h2o_production[fuel]
-                for fuel in self.h2o_production.keys()
-                if fuel in fuel_composition
-            )
-
-            # SO2 생성량
-            so2_total = sum(
-                fuel_molar_flow * fuel_composition[fuel] * self.so2_production[fuel]
-                for fuel in self.so2_production.keys()
-                if fuel in fuel_composition
-            )
-
-            # He 유량 (불활성 기체)
-            he_flow = fuel_molar_flow * fuel_composition["He"]
+        """필요 공기량 계산 ((필요 공기량, 이론적 O2 소비량) 반환)"""
+        return self._air_requirement_full(
+            fuel_molar_flow, fuel_composition, target_o2_ratio
+        )[:2]
 
-            # N2 총량 (연료 + 공기)
-            n2_total = (
-                o2_supply / self.air_o2_ratio * self.air_n2_ratio
-                + fuel_molar_flow * fuel_composition["N2"]
+    def _air_requirement_full(
+        self, fuel_molar_flow, fuel_composition, target_o2_ratio
+    ):
+        """필요 공기량과 연소 생성물 유량 전체를 계산 (_solve_air 반환값 그대로)"""
+        # 목표 농도가 물리적 상한(공기 중 O2 분율)에 닿으면 해가 발산하므로
+        # 상한 근처는 상대 여유를 두고 거부
+        k = self.air_n2_ratio / self.air_o2_ratio
+        if 1 - target_o2_ratio * (1 + k) <= 1e-12:
+            raise ValueError(
+                f"목표 산소 농도가 너무 높습니다: {target_o2_ratio}"
             )
 
-            # 잔여 O2
-            o2_remaining = o2_supply - theoretical_o2
-
-            return (
-                co2_total + h2o_total + so2_total + he_flow + n2_total + o2_remaining
-            ), o2_remaining
-
-        # 이분법으로 필요 O2량 계산
-        o2_low = theoretical_o2
-        o2_high = theoretical_o2 * 5
-
-        while (o2_high - o2_low) > 1e-6:
-            o2_mid = (o2_low + o2_high) / 2
-            total_exhaust, o2_remaining = calculate_total_exhaust(o2_mid)
-            current_o2_ratio = o2_remaining / total_exhaust
-
-            if current_o2_ratio < target_o2_ratio:
-                o2_low = o2_mid
-            else:
-                o2_high = o2_mid
+        # 조성을 고정 순서 tuple로 변환해 캐시 키로 사용
+        # (몰 유량은 9 유효숫자로 반올림해 스윕에서 캐시 적중률을 높임)
+        composition_key = tuple(
+            fuel_composition.get(gas, 0.0) for gas in self.species
+        )
+        return self._solve_air_cached(
+            float(f"{fuel_molar_flow:.9g}"), composition_key, target_o2_ratio
+        )
 
-        required_o2 = o2_high
-        return required_o2 / self.air_o2_ratio
+    @lru_cache(maxsize=256)
+    def _solve_air_cached(self, fuel_molar_flow, composition_key, target_o2_ratio):
+        """동일 인자 반복 호출을 위한 필요 공기량 계산 캐시
+
+        _solve_air의 시그니처가 연속 float64 배열로 고정되어 있으므로
+        조성 tuple을 그 형태로 변환해 전달한다.
+        """
+        return _solve_air(
+            np.ascontiguousarray(composition_key, dtype=np.float64),
+            float(fuel_molar_flow),
+            self._o2req,
+            self._co2prod,
+            self._h2oprod,
+            self._so2prod,
+            int(Species.He),
+            int(Species.N2),
+            int(Species.H2O),
+            self.air_o2_ratio,
+            self.air_n2_ratio,
+            target_o2_ratio,
+        )
 
     def calculate_exhaust_gas(
-        self, fuel_mass_flow, fuel_composition, target_o2_ratio, excess_air_ratio=1.0
+        self, fuel_mass_flow, fuel_composition, target_o2_ratio, excess_air_ratio=None
     ):
-        """배기가스 조성 및 유량 계산"""
+        """배기가스 조성 및 유량 계산
+
+        excess_air_ratio가 주어지면(> 1.0) 목표 O2 농도 대신
+        화학양론적 공기량 x 과잉 공기비로 공기량을 결정한다.
+        """
         # 연료 몰 유량 계산
         fuel_molar_flow = self.calculate_molar_flow(fuel_mass_flow, fuel_composition)
 
-        # 필요 공기량 계산
-        required_air = self.calculate_air_requirement(
-            fuel_molar_flow, fuel_composition, target_o2_ratio
-        )
+        if excess_air_ratio is not None and excess_air_ratio > 1.0:
+            # 과잉 공기비 경로: 목표 O2 = 0으로 화학양론적 공기량을 구한 뒤 배율 적용
+            (
+                required_air,
+                theoretical_o2,
+                co2_flow,
+                h2o_flow,
+                so2_flow,
+                he_flow,
+                fuel_n2_flow,
+            ) = self._air_requirement_full(fuel_molar_flow, fuel_composition, 0.0)
+            required_air *= excess_air_ratio
+        else:
+            # 필요 공기량과 연소 생성물 유량을 한 번에 계산
+            (
+                required_air,
+                theoretical_o2,
+                co2_flow,
+                h2o_flow,
+                so2_flow,
+                he_flow,
+                fuel_n2_flow,
+            ) = self._air_requirement_full(
+                fuel_molar_flow, fuel_composition, target_o2_ratio
+            )
 
         # 공기 성분 몰 유량
         o2_flow = required_air * self.air_o2_ratio
         n2_air_flow = required_air * self.air_n2_ratio
 
-        # 연소 생성물 계산
-        co2_flow = sum(
-            fuel_molar_flow * fuel_composition[fuel] * self.co2_production[fuel]
-            for fuel in self.co2_production.keys()
-            if fuel in fuel_composition
-        )
-
-        h2o_flow = fuel_molar_flow * fuel_composition["H2O"] + sum(
-            fuel_molar_flow * fuel_composition[fuel] * self.h2o_production[fuel]
-            for fuel in self.h2o_production.keys()
-            if fuel in fuel_composition
-        )
-
-        so2_flow = sum(
-            fuel_molar_flow * fuel_composition[fuel] * self.so2_production[fuel]
-            for fuel in self.so2_production.keys()
-            if fuel in fuel_composition
-        )
-
-        he_flow = fuel_molar_flow * fuel_composition["He"]
-
-        # 이론적 O2 소비량
-        theoretical_o2 = self.calculate_stoichiometric_o2(
-            fuel_molar_flow, fuel_composition
-        )
+        # 잔여 O2
         o2_remaining = o2_flow - theoretical_o2
 
         # N2 총량
-        n2_total_flow = n2_air_flow + fuel_molar_flow * fuel_composition["N2"]
+        n2_total_flow = n2_air_flow + fuel_n2_flow
 
-        # 총 배기가스 몰 유량
-        total_exhaust_flow = (
-            co2_flow + h2o_flow + so2_flow + he_flow + o2_remaining + n2_total_flow
+        # 배기가스 몰 유량 벡터 (self._exhaust_species 순서)
+        flows = np.array(
+            [co2_flow, h2o_flow, so2_flow, he_flow, o2_remaining, n2_total_flow]
         )
 
         # 배기가스 조성 계산 (몰 분율)
-        exhaust_composition = {
-            "CO2": co2_flow / total_exhaust_flow * 100,
-            "H2O": h2o_flow / total_exhaust_flow * 100,
-            "SO2": so2_flow / total_exhaust_flow * 100,
-            "He": he_flow / total_exhaust_flow * 100,
-            "O2": o2_remaining / total_exhaust_flow * 100,
-            "N2": n2_total_flow / total_exhaust_flow * 100,
-        }
+        exhaust_composition = dict(
+            zip(self._exhaust_species, flows / flows.sum() * 100)
+        )
 
         # 질량 유량 계산 (kg/s)
-        mass_flows = {
-            "CO2": co2_flow * self.MW["CO2"],
-            "H2O": h2o_flow * self.MW["H2O"],
-            "SO2": so2_flow * self.MW["SO2"],
-            "He": he_flow * self.MW["He"],
-            "O2": o2_remaining * self.MW["O2"],
-            "N2": n2_total_flow * self.MW["N2"],
-        }
+        mass_flows_arr = flows * self._mw_exh
+        mass_flows = dict(zip(self._exhaust_species, mass_flows_arr))
 
-        total_mass_flow = sum(mass_flows.values())
+        total_mass_flow = mass_flows_arr.sum()
 
         return {
             "composition": exhaust_composition,
             "mass_flows": mass_flows,
             "total_mass_flow": total_mass_flow,
-            "air_flow": required_air
-            * (self.MW["O2"] * self.air_o2_ratio + self.MW["N2"] * self.air_n2_ratio),
+            "air_flow": required_air * self._air_MW,
+        }
+
+    def calculate_exhaust_gas_batch(
+        self, fuel_mass_flows, fuel_compositions, target_o2_ratio
+    ):
+        """여러 케이스의 배기가스 조성 및 유량 일괄 계산 (브로드캐스팅)
+
+        fuel_compositions는 self.species 순서의 (B, N) 배열 또는
+        조성 dict의 리스트. 반환 배열의 성분 순서는 self._exhaust_species.
+        """
+        if isinstance(fuel_compositions, np.ndarray):
+            X = np.atleast_2d(np.asarray(fuel_compositions, dtype=np.float64))
+        else:
+            X = np.array(
+                [self._vectorize_composition(comp) for comp in fuel_compositions]
+            )
+        mass_flows_in = np.asarray(fuel_mass_flows, dtype=np.float64)
+
+        k = self.air_n2_ratio / self.air_o2_ratio
+        denominator = 1 - target_o2_ratio * (1 + k)
+        if denominator <= 1e-12:
+            raise ValueError(
+                f"목표 산소 농도가 너무 높습니다: {target_o2_ratio}"
+            )
+
+        # 내적은 float32로 수행해 이동 바이트를 절반으로 줄이고
+        # (상대 오차 ~1e-7), 결과는 float64로 승격해 이후를 계산
+        X32 = X.astype(np.float32)
+
+        # 연료 몰 유량 (B,)
+        fuel_molar_flow = mass_flows_in / (X32 @ self._mw32).astype(np.float64)
+
+        # 연소 생성물 및 이론적 O2 소비량 (각 (B,))
+        theoretical_o2 = fuel_molar_flow * (X32 @ self._o2req32).astype(np.float64)
+        co2_flow = fuel_molar_flow * (X32 @ self._co2prod32).astype(np.float64)
+        h2o_flow = fuel_molar_flow * (
+            X[:, Species.H2O] + (X32 @ self._h2oprod32).astype(np.float64)
+        )
+        so2_flow = fuel_molar_flow * (X32 @ self._so2prod32).astype(np.float64)
+        he_flow = fuel_molar_flow * X[:, Species.He]
+        fuel_n2_flow = fuel_molar_flow * X[:, Species.N2]
+
+        # 필요 O2를 요소별 닫힌 형태로 풀이
+        # (스칼라 나눗셈은 역수 곱으로 바꿔 요소별 나눗셈을 제거)
+        const_part = (
+            co2_flow + h2o_flow + so2_flow + he_flow + fuel_n2_flow - theoretical_o2
+        )
+        required_o2 = (theoretical_o2 + target_o2_ratio * const_part) * (
+            1.0 / denominator
+        )
+        required_air = required_o2 * (1.0 / self.air_o2_ratio)
+
+        o2_remaining = required_o2 - theoretical_o2
+        n2_total_flow = required_air * self.air_n2_ratio + fuel_n2_flow
+
+        # (B, 6) 배기가스 몰 유량 행렬
+        flows = np.stack(
+            [co2_flow, h2o_flow, so2_flow, he_flow, o2_remaining, n2_total_flow],
+            axis=1,
+        )
+        total_exhaust_flow = flows.sum(axis=1)
+        mass_flows = flows * self._mw_exh
+
+        return {
+            "species": self._exhaust_species,
+            "composition": flows * (100.0 / total_exhaust_flow)[:, None],
+            "mass_flows": mass_flows,
+            "total_mass_flow": mass_flows.sum(axis=1),
+            "air_flow": required_air * self._air_MW,
         }
 
 
 
 ## input check
-def get_composition_mole_fraction():
+def get_composition_mole_fraction(prompt_fn=input):
     default_composition = {
         "CH4": 58.57,
         "C2H6": 0.08,
@@ -214,31 +393,26 @@ def get_composition_mole_fraction():
         "CO2": 3.8,
     }
 
-    use_default = input("Use default composition? (Y/n): ")
-    
+    use_default = prompt_fn("Use default composition? (Y/n): ")
+
     if use_default.lower() == "yes" or use_default.lower() == "y":
-        total = sum(default_composition.values())
-        if total > 1.0:
-            composition = {k: v / total for k, v in default_composition.items()}
-        return composition
+        composition = default_composition
     else:
         composition = {}
         for component in default_composition:
-            fraction = float(input(f"Enter the fraction for {component}: "))
+            fraction = float(prompt_fn(f"Enter the fraction for {component}: "))
             composition[component] = fraction
-        
-        total = sum(composition.values())
-        if total > 1.0:
-            composition = {k: v / total for k, v in composition.items()}
-        
-        return composition
-
-def main():
+
+    # 항상 합이 1이 되도록 정규화
+    values = np.fromiter(composition.values(), dtype=np.float64)
+    return dict(zip(composition.keys(), values / values.sum()))
+
+def main(prompt_fn=input):
     calculator = FuelGasCombustionCalculator()
     print("연료 가스 연소 계산기")
     print("==================")
     # 사용자 입력
-    composition = get_composition_mole_fraction()
+    composition = get_composition_mole_fraction(prompt_fn)
     print(composition)
 
     # 입력값 확인
@@ -248,10 +422,11 @@ def main():
         return
 
     # 추가 입력
-    fuel_mass_flow = float(input("\n연료 가스 질량 유량 (kg/s): "))
-    target_o2 = float(input("목표 배기가스 산소 농도 (%): ")) / 100
-    excess_air = float(input("과잉 공기비 (1.0 이상): "))
-    if excess_air < 1.0:
+    fuel_mass_flow = float(prompt_fn("\n연료 가스 질량 유량 (kg/s): "))
+    target_o2 = float(prompt_fn("목표 배기가스 산소 농도 (%): ")) / 100
+    excess_air_input = prompt_fn("과잉 공기비 (1.0 이상, 빈칸이면 목표 O2 농도 기준): ")
+    excess_air = float(excess_air_input) if excess_air_input.strip() else None
+    if excess_air is not None and excess_air < 1.0:
         print("\n오류: 과잉 공기비는 1.0 이상이어야 합니다.")
         return
 